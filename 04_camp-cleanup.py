@@ -4,7 +4,10 @@
 # SPDX-License-Identifier: MIT
 
 import time
-from typing import List, Tuple
+from array import array
+from itertools import repeat
+from operator import and_, le, mul, sub
+from typing import List, NamedTuple, Optional, Tuple
 
 from aoc_utils import get_input_path, print_elapsed_time
 
@@ -12,6 +15,23 @@ Range = Tuple[int, int]
 Pair = List[Range]
 
 
+class AssignmentColumns(NamedTuple):
+    a_lo: array
+    a_hi: array
+    b_lo: array
+    b_hi: array
+
+
+class Assignment(NamedTuple):
+    start: int
+    end: int
+    pair: int  # Index of the pair in the input.
+    elf: int  # Index of the elf within the pair.
+
+
+SEPARATORS = str.maketrans("-,", "  ")
+
+
 def preprocess_input(contents: List[str]) -> List[Pair]:
     assignment_pairs: List[Pair] = []
     for line in contents:
@@ -36,15 +56,104 @@ def count_overlapping_ranges(pairs: List[Pair]) -> int:
     return sum((x[1] - y[0]) >= 0 for x, y in sorted_pairs)
 
 
+def parse_columns(contents: str) -> AssignmentColumns:
+    """Parses the whole input at once into four columns of 32-bit integers."""
+    values = array("i", map(int, contents.translate(SEPARATORS).split()))
+    assert len(values) % 4 == 0
+    return AssignmentColumns(values[0::4], values[1::4], values[2::4], values[3::4])
+
+
+def count_fully_contained_columns(columns: AssignmentColumns) -> int:
+    # One range contains the other iff the differences of the bounds do not have the
+    # same sign.
+    lo_diffs = map(sub, columns.a_lo, columns.b_lo)
+    hi_diffs = map(sub, columns.a_hi, columns.b_hi)
+    return sum(map(le, map(mul, lo_diffs, hi_diffs), repeat(0)))
+
+
+def count_overlapping_columns(columns: AssignmentColumns) -> int:
+    a_starts_before_b_ends = map(le, columns.a_lo, columns.b_hi)
+    b_starts_before_a_ends = map(le, columns.b_lo, columns.a_hi)
+    return sum(map(and_, a_starts_before_b_ends, b_starts_before_a_ends))
+
+
+class IntervalNode:
+    """Node of a centered interval tree: stores all assignments containing `center`,
+    sorted by start (ascending) and by end (descending)."""
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, assignments: List[Assignment]) -> None:
+        by_start = sorted(assignments, key=lambda a: a.start)
+        # Centering on a start point guarantees that the node is never empty.
+        self.center = by_start[len(by_start) // 2].start
+
+        center = self.center
+        left = [a for a in by_start if a.end < center]
+        right = [a for a in by_start if a.start > center]
+        self.by_start = [a for a in by_start if a.start <= center <= a.end]
+        self.by_end = sorted(self.by_start, key=lambda a: a.end, reverse=True)
+        self.left: Optional[IntervalNode] = IntervalNode(left) if left else None
+        self.right: Optional[IntervalNode] = IntervalNode(right) if right else None
+
+
+class IntervalIndex:
+    """Interval tree over all assignments of `pairs` (as returned by
+    `preprocess_input`) to answer stabbing and range-overlap queries in O(log n + k)."""
+
+    __slots__ = ("_root",)
+
+    def __init__(self, pairs: List[Pair]) -> None:
+        assignments = [
+            Assignment(start, end, pair_idx, elf_idx)
+            for pair_idx, pair in enumerate(pairs)
+            for elf_idx, (start, end) in enumerate(pair)
+        ]
+        self._root = IntervalNode(assignments) if assignments else None
+
+    def overlapping(self, lo: int, hi: int) -> List[Assignment]:
+        """Returns all assignments that share at least one section with `[lo, hi]`."""
+        result: List[Assignment] = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if hi < node.center:
+                for assignment in node.by_start:
+                    if assignment.start > hi:
+                        break
+                    result.append(assignment)
+                stack.append(node.left)
+            elif lo > node.center:
+                for assignment in node.by_end:
+                    if assignment.end < lo:
+                        break
+                    result.append(assignment)
+                stack.append(node.right)
+            else:
+                result.extend(node.by_start)
+                stack.extend((node.left, node.right))
+        return result
+
+    def covering(self, section: int) -> List[Assignment]:
+        """Returns all assignments that include `section`."""
+        return self.overlapping(section, section)
+
+    def pairs_overlapping(self, lo: int, hi: int) -> List[int]:
+        """Returns the indices of all pairs with an assignment overlapping the range."""
+        return sorted({assignment.pair for assignment in self.overlapping(lo, hi)})
+
+
 def main():
     data_path = get_input_path("Day 04: Camp Cleanup")
     with open(data_path, "r") as file:
-        contents = file.read().splitlines()
+        contents = file.read()
 
     start = time.monotonic()
-    assignment_pairs = preprocess_input(contents)
-    count_fully_contained = count_fully_contained_ranges(assignment_pairs)
-    count_overlapping = count_overlapping_ranges(assignment_pairs)
+    columns = parse_columns(contents)
+    count_fully_contained = count_fully_contained_columns(columns)
+    count_overlapping = count_overlapping_columns(columns)
     stop = time.monotonic()
 
     print(f"Number of fully contained ranges: {count_fully_contained}")
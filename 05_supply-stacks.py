@@ -5,18 +5,24 @@
 
 import re
 import time
-from copy import deepcopy
+from enum import Enum
 from typing import List, NamedTuple, Tuple
 
 from aoc_utils import get_input_path, print_elapsed_time
 
 Stack = List[str]
+CrateStack = bytearray  # One byte per crate, bottom to top.
 Instruction = NamedTuple("Instruction", count=int, source=int, destination=int)
 
 STACKS_NUM_REGEX = re.compile(r"(\d+)(?=\D*$)")
 INSTRUCTION_REGEX = re.compile(r".*?(\d+).*?(\d+).*?(\d+)")
 
 
+class CrateMover(Enum):
+    MODEL_9000 = 9000
+    MODEL_9001 = 9001
+
+
 def preprocess_input(contents: str) -> Tuple[List[Stack], List[Instruction]]:
     stacks_raw, instructions_raw = contents.split("\n\n")
     stacks_lines = stacks_raw.splitlines()
@@ -45,14 +51,121 @@ def preprocess_input(contents: str) -> Tuple[List[Stack], List[Instruction]]:
 
 def apply_instruction_9000(stacks: List[Stack], instruction: Instruction):
     cnt, src, dst = instruction
-    for _ in range(cnt):
-        stacks[dst - 1].append(stacks[src - 1].pop())
+    if src == dst:
+        return
+    block_start = len(stacks[src - 1]) - cnt
+    stacks[dst - 1].extend(reversed(stacks[src - 1][block_start:]))
+    del stacks[src - 1][block_start:]
 
 
 def apply_instruction_9001(stacks: List[Stack], instruction: Instruction):
     cnt, src, dst = instruction
-    stacks[dst - 1].extend(stacks[src - 1][-cnt:])
-    del stacks[src - 1][-cnt:]
+    if src == dst:
+        return
+    block_start = len(stacks[src - 1]) - cnt
+    stacks[dst - 1].extend(stacks[src - 1][block_start:])
+    del stacks[src - 1][block_start:]
+
+
+def to_crate_stacks(stacks: List[Stack]) -> List[CrateStack]:
+    return [bytearray("".join(stack), "ascii") for stack in stacks]
+
+
+def move_crates(stacks: List[CrateStack], instruction: Instruction, model: CrateMover):
+    """Moves all crates of `instruction` as a single slice transfer. The CrateMover 9000
+    moves crates one at a time, which is the same as moving the reversed block."""
+    cnt, src, dst = instruction
+    if src == dst:  # Moving crates onto their own stack leaves it unchanged.
+        return
+    source = stacks[src - 1]
+    block_start = len(source) - cnt  # Not `-cnt`, which is wrong for 0.
+    if model == CrateMover.MODEL_9000:
+        stacks[dst - 1] += source[block_start:][::-1]
+    else:
+        stacks[dst - 1] += source[block_start:]
+    del source[block_start:]
+
+
+def run_crane(
+    stacks: List[Stack], instructions: List[Instruction], model: CrateMover
+) -> str:
+    """Applies all `instructions` to a copy of `stacks` and returns the top crates."""
+    crate_stacks = to_crate_stacks(stacks)
+    for instruction in instructions:
+        move_crates(crate_stacks, instruction, model)
+    return "".join(chr(stack[-1]) for stack in crate_stacks)
+
+
+class CraneReplay:
+    """Replays `instructions` with snapshots of all stacks after every `interval`
+    instructions, so that the state after any instruction can be restored by applying
+    at most `interval - 1` instructions to the closest snapshot."""
+
+    __slots__ = ("instructions", "model", "interval", "_snapshots")
+
+    def __init__(
+        self,
+        stacks: List[Stack],
+        instructions: List[Instruction],
+        model: CrateMover,
+        interval: int = 1000,
+    ) -> None:
+        assert interval > 0
+        self.instructions = instructions
+        self.model = model
+        self.interval = interval
+
+        crate_stacks = to_crate_stacks(stacks)
+        self._snapshots: List[Tuple[bytes, ...]] = []
+        for idx, instruction in enumerate(instructions):
+            if idx % interval == 0:
+                self._snapshots.append(tuple(map(bytes, crate_stacks)))
+            move_crates(crate_stacks, instruction, model)
+        if len(instructions) % interval == 0:
+            self._snapshots.append(tuple(map(bytes, crate_stacks)))
+
+    def state_at(self, step: int) -> List[Stack]:
+        """Returns the stacks after the first `step` instructions have been applied."""
+        assert 0 <= step <= len(self.instructions)
+        checkpoint = step // self.interval
+        crate_stacks = [bytearray(stack) for stack in self._snapshots[checkpoint]]
+        for instruction in self.instructions[checkpoint * self.interval : step]:
+            move_crates(crate_stacks, instruction, self.model)
+        return [list(stack.decode("ascii")) for stack in crate_stacks]
+
+
+def trace_top_crates(
+    stacks: List[Stack], instructions: List[Instruction], model: CrateMover
+) -> str:
+    """Computes the top crates without moving any crates: starting from the final top
+    position of each stack, the instructions are walked backwards to find where that
+    crate was originally located. Only the stack heights are simulated."""
+    heights = [len(stack) for stack in stacks]
+    for cnt, src, dst in instructions:
+        heights[src - 1] -= cnt
+        heights[dst - 1] += cnt
+    assert all(height > 0 for height in heights)
+
+    # Position of every traced crate as (stack index, height index from the bottom).
+    positions = [(idx, height - 1) for idx, height in enumerate(heights)]
+    for cnt, src, dst in reversed(instructions):
+        src, dst = src - 1, dst - 1
+        if src == dst:
+            continue
+        block_start = heights[dst] - cnt  # Lowest moved crate on the destination.
+        heights[src] += cnt
+        heights[dst] -= cnt
+
+        for i, (stack, pos) in enumerate(positions):
+            if stack != dst or pos < block_start:
+                continue
+            offset = pos - block_start
+            if model == CrateMover.MODEL_9000:
+                positions[i] = (src, heights[src] - 1 - offset)
+            else:
+                positions[i] = (src, heights[src] - cnt + offset)
+
+    return "".join(stacks[stack][pos] for stack, pos in positions)
 
 
 def main():
@@ -61,15 +174,9 @@ def main():
         contents = file.read()
 
     start = time.monotonic()
-    stacks_pt1, instructions = preprocess_input(contents)
-    stacks_pt2 = deepcopy(stacks_pt1)
-
-    for instruction in instructions:
-        apply_instruction_9000(stacks_pt1, instruction)
-        apply_instruction_9001(stacks_pt2, instruction)
-
-    top_crates_pt1 = "".join(map(lambda x: x[-1], stacks_pt1))
-    top_crates_pt2 = "".join(map(lambda x: x[-1], stacks_pt2))
+    stacks, instructions = preprocess_input(contents)
+    top_crates_pt1 = trace_top_crates(stacks, instructions, CrateMover.MODEL_9000)
+    top_crates_pt2 = trace_top_crates(stacks, instructions, CrateMover.MODEL_9001)
     stop = time.monotonic()
 
     print(f"Top crates when using CrateMover 9000: {top_crates_pt1}")
@@ -3,7 +3,11 @@
 # Copyright (c) 2022, xphade <github.com/xphade>
 # SPDX-License-Identifier: MIT
 
+import mmap
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Optional
 
 from aoc_utils import get_input_path, print_elapsed_time
 
@@ -18,14 +22,99 @@ def find_unique_sequence(datastream: str, distinct_characters: int) -> int:
     assert False  # If we get here, we did not find a unique sequence (invalid input).
 
 
+def scan_for_markers(datastream: bytes, window_sizes: Iterable[int]) -> Dict[int, int]:
+    """Finds the first marker for each of the `window_sizes` in a single linear scan.
+    Keeps the last position of every byte value to track the longest run of distinct
+    bytes ending at the current position; a marker of size k is found as soon as that
+    run is at least k long. Window sizes without a marker are missing in the result."""
+    pending = sorted(set(window_sizes), reverse=True)
+    markers: Dict[int, int] = {}
+    last_seen = [-1] * 256
+    run_start = 0
+
+    for idx, byte in enumerate(datastream):
+        if last_seen[byte] >= run_start:
+            run_start = last_seen[byte] + 1
+        last_seen[byte] = idx
+
+        while pending and idx - run_start + 1 >= pending[-1]:
+            markers[pending.pop()] = idx + 1
+        if not pending:
+            break
+
+    return markers
+
+
+def find_markers(datastream: bytes, window_sizes: Iterable[int]) -> Dict[int, int]:
+    window_sizes = set(window_sizes)
+    markers = scan_for_markers(datastream, window_sizes)
+    assert len(markers) == len(window_sizes)  # Otherwise the input is invalid.
+    return markers
+
+
+def _find_marker_in_chunk(
+    path: Path, start: int, stop: int, distinct_characters: int
+) -> Optional[int]:
+    """Searches for a marker within bytes `[start, stop)` of the mapped file."""
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as datastream:
+            chunk = datastream[start:stop]
+    markers = scan_for_markers(chunk, [distinct_characters])
+    return start + markers[distinct_characters] if markers else None
+
+
+def find_marker_parallel(
+    path: Path,
+    distinct_characters: int,
+    chunk_size: int = 64 * 1024 * 1024,
+    max_workers: Optional[int] = None,
+) -> Optional[int]:
+    """Memory-maps the datastream at `path` and scans chunks of it in a process pool.
+    Chunks overlap by `distinct_characters - 1` bytes so that no marker is missed.
+    Once a marker is found, chunks after it that have not started yet are skipped;
+    chunks that are already running still finish."""
+    if path.stat().st_size == 0:
+        return None  # An empty file cannot be memory-mapped.
+
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as datastream:
+            size = len(datastream)
+            while size > 0 and datastream[size - 1] == ord("\n"):
+                size -= 1
+
+    best: Optional[int] = None
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                _find_marker_in_chunk,
+                path,
+                start,
+                min(start + chunk_size + distinct_characters - 1, size),
+                distinct_characters,
+            ): start
+            for start in range(0, size, chunk_size)
+        }
+        for future in as_completed(futures):
+            if future.cancelled() or (marker := future.result()) is None:
+                continue
+            if best is None or marker < best:
+                best = marker
+                for other, start in futures.items():
+                    if start > futures[future]:
+                        other.cancel()
+
+    return best
+
+
 def main():
     data_path = get_input_path("Day 06: Tuning Trouble")
-    with open(data_path, "r") as file:
-        datastream = file.read().strip("\n")
+    with open(data_path, "rb") as file:
+        datastream = file.read().strip(b"\n")
 
     start = time.monotonic()
-    processed_chars_start = find_unique_sequence(datastream, 4)
-    processed_chars_message = find_unique_sequence(datastream, 14)
+    markers = find_markers(datastream, [4, 14])
+    processed_chars_start = markers[4]
+    processed_chars_message = markers[14]
     stop = time.monotonic()
 
     print(f"Characters processed to find start marker: {processed_chars_start}")
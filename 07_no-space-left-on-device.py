@@ -7,7 +7,9 @@ from __future__ import annotations
 
 import re
 import time
-from typing import List, NamedTuple, Optional
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
 
 from aoc_utils import get_input_path, print_elapsed_time
 
@@ -24,11 +26,13 @@ class TerminalCommand(NamedTuple):
 
 
 class Directory:
+    __slots__ = ("name", "size", "files", "dirs", "parent")
+
     def __init__(self, name: str, parent: Optional[Directory]) -> None:
         self.name: str = name
         self.size = 0
         self.files: List[File] = []
-        self.dirs: List[Directory] = []
+        self.dirs: Dict[str, Directory] = {}
         self.parent = parent
 
     def add_file(self, file: File) -> None:
@@ -36,13 +40,16 @@ class Directory:
         self.size += file.size
 
     def add_directory(self, directory: Directory) -> None:
-        self.dirs.append(directory)
+        self.dirs.setdefault(directory.name, directory)
 
 
 COMMAND_REGEX = re.compile(r"^\$ (cd|ls) *(.*)$")
 DIRECTORY_REGEX = re.compile(r"^dir (.*)$")
 FILE_REGEX = re.compile(r"^(\d+) (.*)$")
 
+TOTAL_DISK_SPACE = 70000000
+REQUIRED_DISK_SPACE = 30000000
+
 
 def preprocess_terminal_output(terminal_output: List[str]) -> List[TerminalCommand]:
     terminal_commands: List[TerminalCommand] = []
@@ -84,11 +91,8 @@ def cd(argument: str, current_directory: Directory) -> Directory:
         assert new_directory.parent
         new_directory = new_directory.parent
     else:
-        assert argument in [dir.name for dir in current_directory.dirs]
-        for dir in current_directory.dirs:
-            if dir.name == argument:
-                new_directory = dir
-                break
+        assert argument in current_directory.dirs
+        new_directory = current_directory.dirs[argument]
     return new_directory
 
 
@@ -105,50 +109,132 @@ def apply_commands(
             assert False  # Should never happen.
 
 
+def build_tree(terminal_output: Iterable[str]) -> Directory:
+    """Builds the directory tree while streaming through the terminal output line by
+    line (e.g. straight from an open file), so the log is never held in memory.
+    Directory sizes already include all subdirectories, i.e. no `calculate_size` pass is
+    needed. Size changes are passed on to the parent whenever a directory is left."""
+    root = Directory(name="/", parent=None)
+    path = [root]
+    pending_sizes = [0]  # Size not yet passed on to the parent, per directory in path.
+
+    def leave_directory():
+        pending_size = pending_sizes.pop()
+        path.pop()
+        path[-1].size += pending_size
+        pending_sizes[-1] += pending_size
+
+    for line in terminal_output:
+        line = line.rstrip("\n")
+        if match := COMMAND_REGEX.match(line):
+            if match.group(1) != "cd":
+                continue
+            argument = match.group(2)
+            if argument == "/":
+                while len(path) > 1:
+                    leave_directory()
+            elif argument == "..":
+                assert len(path) > 1
+                leave_directory()
+            else:
+                path.append(cd(argument, path[-1]))
+                pending_sizes.append(0)
+        elif match := DIRECTORY_REGEX.match(line):
+            path[-1].add_directory(Directory(name=match.group(1), parent=path[-1]))
+        elif match := FILE_REGEX.match(line):
+            file = File(name=match.group(2), size=int(match.group(1)))
+            path[-1].add_file(file)
+            pending_sizes[-1] += file.size
+        else:
+            assert False  # Should never happen.
+
+    while len(path) > 1:
+        leave_directory()
+    return root
+
+
+def iterate_post_order(root: Directory) -> Iterator[Directory]:
+    """Yields all directories below (and including) `root`, children before parents.
+    Uses an explicit stack, so deeply nested trees do not hit the recursion limit."""
+    stack = [(root, False)]
+    while stack:
+        directory, children_done = stack.pop()
+        if children_done:
+            yield directory
+            continue
+        stack.append((directory, True))
+        stack.extend((child, False) for child in directory.dirs.values())
+
+
 def calculate_size(current_directory: Directory) -> int:
-    for dir in current_directory.dirs:
-        current_directory.size += calculate_size(dir)
+    for directory in iterate_post_order(current_directory):
+        for dir in directory.dirs.values():
+            directory.size += dir.size
     return current_directory.size
 
 
 def directory_sizes_max_100k(current_directory: Directory) -> List[int]:
-    sizes: List[int] = []
-    for dir in current_directory.dirs:
-        sizes.extend(directory_sizes_max_100k(dir))
-
-    if current_directory.size <= 100000:
-        sizes.append(current_directory.size)
-
-    return sizes
+    return [
+        directory.size
+        for directory in iterate_post_order(current_directory)
+        if directory.size <= 100000
+    ]
 
 
 def find_directory_size_to_delete(
     current_directory: Directory, size_needed: int, current_best: int
 ) -> int:
-    if current_directory.size >= size_needed and current_directory.size < current_best:
-        current_best = current_directory.size
+    for directory in iterate_post_order(current_directory):
+        if directory.size >= size_needed and directory.size < current_best:
+            current_best = directory.size
+    return current_best
 
-    for dir in current_directory.dirs:
-        current_best = find_directory_size_to_delete(dir, size_needed, current_best)
 
-    return current_best
+def get_path(directory: Directory) -> str:
+    names: List[str] = []
+    while directory.parent is not None:
+        names.append(directory.name)
+        directory = directory.parent
+    return "/" + "/".join(reversed(names))
+
+
+class DirectorySizeIndex:
+    """Directories sorted by size (sizes must already be calculated), with prefix sums
+    to answer threshold queries in O(log n)."""
+
+    __slots__ = ("sizes", "directories", "_prefix_sums")
+
+    def __init__(self, root: Directory) -> None:
+        self.directories = sorted(iterate_post_order(root), key=lambda dir: dir.size)
+        self.sizes = [directory.size for directory in self.directories]
+        self._prefix_sums = list(accumulate(self.sizes, initial=0))
+
+    def sum_of_sizes_at_most(self, threshold: int) -> int:
+        return self._prefix_sums[bisect_right(self.sizes, threshold)]
+
+    def smallest_at_least(self, size_needed: int) -> Optional[Directory]:
+        idx = bisect_left(self.sizes, size_needed)
+        return self.directories[idx] if idx < len(self.directories) else None
+
+    def paths_at_most(self, threshold: int) -> List[str]:
+        idx = bisect_right(self.sizes, threshold)
+        return [get_path(directory) for directory in self.directories[:idx]]
 
 
 def main():
     data_path = get_input_path("Day 07: No Space Left On Device")
-    with open(data_path, "r") as file:
-        terminal_output = file.read().splitlines()
 
     start = time.monotonic()
 
-    commands = preprocess_terminal_output(terminal_output)
-    root = Directory(name="/", parent=None)
-    apply_commands(commands, root)
-    calculate_size(root)
-    print(sum(directory_sizes_max_100k(root)))
-
-    size_needed = 30000000 - (70000000 - root.size)
-    print(find_directory_size_to_delete(root, size_needed, current_best=70000000))
+    with open(data_path, "r") as file:
+        root = build_tree(file)
+    index = DirectorySizeIndex(root)
+    print(index.sum_of_sizes_at_most(100000))
+
+    size_needed = REQUIRED_DISK_SPACE - (TOTAL_DISK_SPACE - root.size)
+    directory_to_delete = index.smallest_at_least(size_needed)
+    assert directory_to_delete is not None
+    print(directory_to_delete.size)
 
     stop = time.monotonic()
 
@@ -4,7 +4,8 @@
 # SPDX-License-Identifier: MIT
 
 import time
-from typing import List, Set, Tuple
+from itertools import accumulate
+from typing import List, Sequence, Set, Tuple
 
 from aoc_utils import get_input_path, print_elapsed_time
 
@@ -49,56 +50,65 @@ def look_outside_top_bottom(tree_map: List[List[int]]) -> Set[Coordinate]:
     return visible_tree_coords
 
 
-# TODO: A lot of repeated code in here, maybe rather do it similarly to part 1.
-def calculate_scenic_score(tree_map: List[List[int]], tree_coord: Coordinate) -> int:
-    x, y = tree_coord
-    tree_height = tree_map[x][y]
-    scenic_score = 1
-    # Left:
-    i, j = x, y
-    blocked_count = 0
-    while j > 0:
-        blocked_count += 1
-        j -= 1
-        if tree_height <= tree_map[i][j]:
-            break
-    scenic_score *= blocked_count
-    # Right:
-    i, j = x, y
-    blocked_count = 0
-    while j < (len(tree_map[i]) - 1):
-        blocked_count += 1
-        j += 1
-        if tree_height <= tree_map[i][j]:
-            break
-    scenic_score *= blocked_count
-    # Top:
-    i, j = x, y
-    blocked_count = 0
-    while i > 0:
-        blocked_count += 1
-        i -= 1
-        if tree_height <= tree_map[i][j]:
-            break
-    scenic_score *= blocked_count
-    # Bottom:
-    i, j = x, y
-    blocked_count = 0
-    while i < (len(tree_map) - 1):
-        blocked_count += 1
-        i += 1
-        if tree_height <= tree_map[i][j]:
-            break
-    scenic_score *= blocked_count
-    return scenic_score
+def visible_from_start(tree_line: Sequence[int]) -> List[bool]:
+    """Flags every tree that is taller than all trees before it, by comparing each
+    height with the cumulative maximum shifted by one."""
+    preceding_max = accumulate(tree_line[:-1], max, initial=-1)
+    return [height > highest for height, highest in zip(tree_line, preceding_max)]
+
+
+def visible_from_both_ends(tree_line: Sequence[int]) -> List[bool]:
+    from_start = visible_from_start(tree_line)
+    from_end = visible_from_start(tree_line[::-1])[::-1]
+    return [a or b for a, b in zip(from_start, from_end)]
+
+
+def calculate_visibility_mask(tree_map: List[List[int]]) -> List[List[bool]]:
+    """Returns a mask of all trees visible from outside the grid, without building any
+    coordinate sets."""
+    rows = [visible_from_both_ends(tree_line) for tree_line in tree_map]
+    cols = [visible_from_both_ends(tree_line) for tree_line in zip(*tree_map)]
+    return [
+        [a or b for a, b in zip(row_mask, col_mask)]
+        for row_mask, col_mask in zip(rows, zip(*cols))
+    ]
+
+
+def count_visible_trees(tree_map: List[List[int]]) -> int:
+    return sum(map(sum, calculate_visibility_mask(tree_map)))
+
+
+def calculate_viewing_distances(tree_line: Sequence[int]) -> List[int]:
+    """Returns how many trees can be seen from each tree when looking towards the start
+    of the line. A monotonic stack holds the indices of all trees that could still block
+    the view of a later tree."""
+    distances: List[int] = []
+    stack: List[int] = []
+    for idx, height in enumerate(tree_line):
+        while stack and tree_line[stack[-1]] < height:
+            stack.pop()
+        distances.append(idx - stack[-1] if stack else idx)
+        stack.append(idx)
+    return distances
+
+
+def multiply_viewing_distances(tree_line: Sequence[int]) -> List[int]:
+    to_start = calculate_viewing_distances(tree_line)
+    to_end = calculate_viewing_distances(tree_line[::-1])[::-1]
+    return [a * b for a, b in zip(to_start, to_end)]
+
+
+def calculate_scenic_scores(tree_map: List[List[int]]) -> List[List[int]]:
+    rows = [multiply_viewing_distances(tree_line) for tree_line in tree_map]
+    cols = [multiply_viewing_distances(tree_line) for tree_line in zip(*tree_map)]
+    return [
+        [a * b for a, b in zip(row_scores, col_scores)]
+        for row_scores, col_scores in zip(rows, zip(*cols))
+    ]
 
 
 def find_best_tree(tree_map: List[List[int]]) -> int:
-    best_score = 0
-    for row in range(len(tree_map)):
-        for col in range(len(tree_map[row])):
-            best_score = max(best_score, calculate_scenic_score(tree_map, (row, col)))
-    return best_score
+    return max(map(max, calculate_scenic_scores(tree_map)))
 
 
 def main():
@@ -108,10 +118,7 @@ def main():
 
     start = time.monotonic()
     tree_map = [[int(c) for c in line] for line in tree_map]
-    visible_tree_coordinates = look_outside_left_right(tree_map).union(
-        look_outside_top_bottom(tree_map)
-    )
-    outside_visible_trees = len(visible_tree_coordinates)
+    outside_visible_trees = count_visible_trees(tree_map)
     best_scenic_score = find_best_tree(tree_map)
     stop = time.monotonic()
 
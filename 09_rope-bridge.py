@@ -5,7 +5,18 @@
 
 import time
 from enum import Enum
-from typing import List, NamedTuple, Optional, Set, Tuple
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+)
 
 from aoc_utils import get_input_path, print_elapsed_time
 
@@ -24,6 +35,133 @@ class Move(NamedTuple):
 
 Coordinate = Tuple[int, int]
 
+DIRECTION_DELTAS: Dict[Direction, Coordinate] = {
+    Direction.RIGHT: (1, 0),
+    Direction.LEFT: (-1, 0),
+    Direction.UP: (0, 1),
+    Direction.DOWN: (0, -1),
+}
+
+
+class VisitedSet(Protocol):
+    """Interface of the containers used to collect visited positions."""
+
+    def add(self, position: Coordinate) -> None:
+        ...
+
+    def update(self, positions: Iterable[Coordinate]) -> None:
+        ...
+
+    def add_path(self, position: Coordinate, direction: Direction, steps: int) -> None:
+        """Adds the `steps` positions after `position` in `direction`."""
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+
+class CoordinateSet(Set[Coordinate]):
+    """Plain set of coordinate tuples, the default container."""
+
+    def add_path(self, position: Coordinate, direction: Direction, steps: int) -> None:
+        self.update(generate_path(position, direction, steps))
+
+
+class PackedVisitedSet:
+    """Stores each position packed into a single integer (y must fit into 32 bits)."""
+
+    __slots__ = ("_cells",)
+
+    def __init__(self) -> None:
+        self._cells: Set[int] = set()
+
+    def add(self, position: Coordinate) -> None:
+        self._cells.add((position[0] << 32) | (position[1] & 0xFFFFFFFF))
+
+    def update(self, positions: Iterable[Coordinate]) -> None:
+        self._cells.update((x << 32) | (y & 0xFFFFFFFF) for x, y in positions)
+
+    def add_path(self, position: Coordinate, direction: Direction, steps: int) -> None:
+        self.update(generate_path(position, direction, steps))
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+
+class BitmapVisitedSet:
+    """Stores visited positions as one bit per cell. The plane is split into square
+    tiles that are only allocated once a position inside them is visited, so memory
+    grows with the visited area rather than with its bounding box."""
+
+    TILE_SHIFT = 6  # Tiles of 64 x 64 cells.
+    TILE_MASK = (1 << TILE_SHIFT) - 1
+    ROW_BYTES = (1 << TILE_SHIFT) // 8
+
+    __slots__ = ("_tiles", "_count")
+
+    def __init__(self) -> None:
+        self._tiles: Dict[Coordinate, bytearray] = {}
+        self._count = 0
+
+    def _tile(self, x: int, y: int) -> bytearray:
+        key = (x >> self.TILE_SHIFT, y >> self.TILE_SHIFT)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = self._tiles[key] = bytearray(self.ROW_BYTES << self.TILE_SHIFT)
+        return tile
+
+    def add(self, position: Coordinate) -> None:
+        x, y = position
+        tile = self._tile(x, y)
+        col, row = x & self.TILE_MASK, y & self.TILE_MASK
+        idx = row * self.ROW_BYTES + (col >> 3)
+        mask = 1 << (col & 7)
+        if not tile[idx] & mask:
+            tile[idx] |= mask
+            self._count += 1
+
+    def update(self, positions: Iterable[Coordinate]) -> None:
+        for position in positions:
+            self.add(position)
+
+    def add_path(self, position: Coordinate, direction: Direction, steps: int) -> None:
+        """Horizontal runs are set with one big-integer operation per tile row they
+        cross. Vertical runs touch one bit per row, so those rows are still visited one
+        by one."""
+        dx, dy = DIRECTION_DELTAS[direction]
+        x, y = position
+        first_x, last_x = sorted((x + dx, x + steps * dx))
+        first_y, last_y = sorted((y + dy, y + steps * dy))
+        shift, tile_mask, row_bytes = self.TILE_SHIFT, self.TILE_MASK, self.ROW_BYTES
+
+        if dy == 0:
+            start = (y & tile_mask) * row_bytes
+            for tile_x in range(first_x >> shift, (last_x >> shift) + 1):
+                tile = self._tile(tile_x << shift, y)
+                lo = max(first_x, tile_x << shift) & tile_mask
+                hi = min(last_x, (tile_x << shift) + tile_mask) & tile_mask
+                row = int.from_bytes(tile[start : start + row_bytes], "little")
+                mask = ((1 << (hi - lo + 1)) - 1) << lo
+                self._count += bin(mask & ~row).count("1")
+                tile[start : start + row_bytes] = (row | mask).to_bytes(
+                    row_bytes, "little"
+                )
+        else:
+            col = x & tile_mask
+            bit = 1 << (col & 7)
+            for tile_y in range(first_y >> shift, (last_y >> shift) + 1):
+                tile = self._tile(x, tile_y << shift)
+                lo = max(first_y, tile_y << shift) & tile_mask
+                hi = min(last_y, (tile_y << shift) + tile_mask) & tile_mask
+                for row in range(lo, hi + 1):
+                    idx = row * row_bytes + (col >> 3)
+                    if not tile[idx] & bit:
+                        tile[idx] |= bit
+                        self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
 
 def are_touching(head: Coordinate, tail: Coordinate) -> bool:
     return abs(head[0] - tail[0]) < 2 and abs(head[1] - tail[1]) < 2
@@ -66,15 +204,79 @@ def apply_step(rope: List[Coordinate], direction: Direction):
             rope[i + 1] = tail
 
 
-def move_rope(rope: List[Coordinate], moves: List[Move]) -> Set[Coordinate]:
-    visited: Set[Coordinate] = {rope[-1]}
+def is_straight(rope: List[Coordinate], direction: Direction) -> bool:
+    """Checks whether every knot lies directly behind the previous one, as seen from
+    `direction`. Moving the head in that direction then translates the whole rope."""
+    dx, dy = DIRECTION_DELTAS[direction]
+    for i in range(len(rope) - 1):
+        if rope[i][0] - rope[i + 1][0] != dx or rope[i][1] - rope[i + 1][1] != dy:
+            return False
+    return True
+
+
+def generate_path(
+    position: Coordinate, direction: Direction, steps: int
+) -> Iterator[Coordinate]:
+    dx, dy = DIRECTION_DELTAS[direction]
+    x, y = position
+    for i in range(1, steps + 1):
+        yield (x + i * dx, y + i * dy)
+
+
+def translate_rope(rope: List[Coordinate], direction: Direction, steps: int):
+    dx, dy = DIRECTION_DELTAS[direction]
+    rope[:] = [(x + steps * dx, y + steps * dy) for x, y in rope]
+
+
+def move_rope(
+    rope: List[Coordinate],
+    moves: List[Move],
+    visited_factory: Callable[[], VisitedSet] = CoordinateSet,
+) -> VisitedSet:
+    visited = visited_factory()
+    visited.add(rope[-1])
     for move in moves:
-        for _ in range(move.steps):
+        steps = move.steps
+        while steps > 0 and not is_straight(rope, move.direction):
             apply_step(rope, move.direction)
             visited.add(rope[-1])
+            steps -= 1
+
+        # Fast path: the remaining steps just translate the (straight) rope.
+        if steps > 0:
+            visited.add_path(rope[-1], move.direction, steps)
+            translate_rope(rope, move.direction, steps)
     return visited
 
 
+def count_visited_per_rope_length(
+    moves: List[Move],
+    knots: int,
+    visited_factory: Callable[[], VisitedSet] = CoordinateSet,
+) -> Dict[int, int]:
+    """Simulates a single rope with `knots` knots and returns the number of positions
+    visited by the tail of every shorter rope, keyed by rope length (2 to `knots`).
+    Each knot only follows the knots in front of it, so knot `i` moves exactly like the
+    tail of a rope with `i + 1` knots."""
+    rope: List[Coordinate] = [(0, 0) for _ in range(knots)]
+    visited = [visited_factory() for _ in rope]
+    for positions, knot in zip(visited, rope):
+        positions.add(knot)
+    for move in moves:
+        steps = move.steps
+        while steps > 0 and not is_straight(rope, move.direction):
+            apply_step(rope, move.direction)
+            for i in range(1, knots):
+                visited[i].add(rope[i])
+            steps -= 1
+
+        if steps > 0:
+            for i in range(1, knots):
+                visited[i].add_path(rope[i], move.direction, steps)
+            translate_rope(rope, move.direction, steps)
+    return {length: len(visited[length - 1]) for length in range(2, knots + 1)}
+
+
 def main():
     data_path = get_input_path("Day 09: Rope Bridge")
     with open(data_path, "r") as file:
@@ -82,8 +284,9 @@ def main():
         moves = [Move(Direction[d], int(s)) for d, s in lines]
 
     start = time.monotonic()
-    num_visited_two_knots = len(move_rope([(0, 0) for _ in range(2)], moves))
-    num_visited_ten_knots = len(move_rope([(0, 0) for _ in range(10)], moves))
+    num_visited = count_visited_per_rope_length(moves, 10)
+    num_visited_two_knots = num_visited[2]
+    num_visited_ten_knots = num_visited[10]
     stop = time.monotonic()
 
     print(f"Positions visited by tail of two-knot rope: {num_visited_two_knots}")
@@ -5,7 +5,8 @@
 
 import re
 import time
-from typing import List, NamedTuple
+from enum import Enum
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
 
 from aoc_utils import get_input_path, print_elapsed_time
 
@@ -15,8 +16,17 @@ class Instruction(NamedTuple):
     arg: int
 
 
+class Encoding(Enum):
+    ASCII = 0
+    EMOJI = 1
+
+
 INSTRUCTION_REGEX = re.compile(r"([a-zA-Z]+) ?(-?\d+)?")
 
+# Framebuffer pixels are 0 (dark) or 1 (lit); these tables map them to characters.
+ASCII_PIXELS = bytes.maketrans(b"\x00\x01", b".#")
+EMOJI_PIXELS = str.maketrans({".": "🎄", "#": "🎅"})
+
 
 def preprocess_input(contents: List[str]) -> List[Instruction]:
     matches = [INSTRUCTION_REGEX.match(line) for line in contents]
@@ -30,6 +40,17 @@ def preprocess_input(contents: List[str]) -> List[Instruction]:
     ]
 
 
+def stream_instructions(lines: Iterable[str]) -> Iterator[Instruction]:
+    """Lazily parses instructions, e.g. directly from an open file."""
+    for line in lines:
+        match = INSTRUCTION_REGEX.match(line)
+        assert match is not None
+        yield Instruction(
+            cmd=match.group(1),
+            arg=(0 if match.group(2) is None else int(match.group(2))),
+        )
+
+
 def get_wait_cycles(instruction: Instruction) -> int:
     assert instruction.cmd in {"noop", "addx"}
     return 1 if instruction.cmd == "noop" else 2
@@ -42,37 +63,39 @@ def execute(instruction: Instruction, register_value: int) -> int:
     return register_value + instruction.arg
 
 
-def cycle(instructions: List[Instruction]) -> List[int]:
+def emulate(instructions: Iterable[Instruction]) -> Iterator[Tuple[int, int]]:
+    """Yields `(cycle, X)` for every cycle, where `X` is the register value during that
+    cycle. Instructions are consumed one at a time, so this runs in constant memory."""
+    current_cycle = 0
     current_value = 1
-    register_values: List[int] = []
-    wait_cycles = 0
-    while len(instructions) > 0 or wait_cycles > 0:
-        wait_cycles = (
-            get_wait_cycles(instructions[0]) if wait_cycles == 0 else wait_cycles
-        )
+    for instruction in instructions:
+        for _ in range(get_wait_cycles(instruction)):
+            current_cycle += 1
+            yield current_cycle, current_value
+        current_value = execute(instruction, current_value)
 
-        register_values.append(current_value)
-        wait_cycles -= 1
 
-        if wait_cycles == 0:
-            current_value = execute(instructions.pop(0), current_value)
+def cycle(instructions: List[Instruction]) -> List[Tuple[int, int]]:
+    return list(emulate(instructions))
 
-    return register_values
 
+def signal_strength(cycle: int, register_value: int) -> int:
+    """Returns the signal strength of `cycle` if it is one of the evaluated cycles
+    (20th, 60th, 100th, ...) and 0 otherwise."""
+    if ((cycle - 20) % 40) != 0:
+        return 0
+    return cycle * register_value
 
-def evaluate_cycles(cycles: List[int]) -> int:
-    result = 0
-    for i in range(len(cycles)):
-        cycle = i + 1
-        if ((cycle - 20) % 40) != 0:
-            continue
-        result += cycle * cycles[i]
-    return result
 
+def evaluate_cycles(cycles: Iterable[Tuple[int, int]]) -> int:
+    """Sums the signal strengths of a `(cycle, X)` stream as yielded by `emulate`."""
+    return sum(signal_strength(cycle, value) for cycle, value in cycles)
 
-def draw_crt(cycles: List[int]) -> str:
+
+def draw_crt(cycles: Iterable[Tuple[int, int]]) -> str:
     crt = ""
-    for pixel_pos, sprite_pos in enumerate(cycles):
+    for cycle, sprite_pos in cycles:
+        pixel_pos = cycle - 1
         if pixel_pos > 0 and pixel_pos % 40 == 0:
             crt += "\n"
 
@@ -83,17 +106,58 @@ def draw_crt(cycles: List[int]) -> str:
     return crt
 
 
+class Crt:
+    """CRT with a preallocated framebuffer of `width * height` pixels."""
+
+    __slots__ = ("width", "height", "framebuffer")
+
+    def __init__(self, width: int = 40, height: int = 6) -> None:
+        self.width = width
+        self.height = height
+        self.framebuffer = bytearray(width * height)
+
+    def draw_pixel(self, pixel_pos: int, sprite_pos: int):
+        """Draws a single pixel; pixels beyond the end of the display are ignored."""
+        if pixel_pos < len(self.framebuffer):
+            lit = -1 <= pixel_pos % self.width - sprite_pos <= 1
+            self.framebuffer[pixel_pos] = lit
+
+    def draw(self, cycles: Iterable[Tuple[int, int]]):
+        """Draws one pixel per cycle from a `(cycle, X)` stream as yielded by `emulate`,
+        where `X` is the sprite position during that cycle."""
+        for cycle, sprite_pos in cycles:
+            self.draw_pixel(cycle - 1, sprite_pos)
+
+    def scanlines(self) -> Iterator[bytes]:
+        for row in range(self.height):
+            yield bytes(self.framebuffer[row * self.width : (row + 1) * self.width])
+
+    def render(self, encoding: Encoding = Encoding.EMOJI) -> str:
+        lines = [
+            scanline.translate(ASCII_PIXELS).decode("ascii")
+            for scanline in self.scanlines()
+        ]
+        if encoding == Encoding.EMOJI:
+            lines = [line.translate(EMOJI_PIXELS) for line in lines]
+        return "\n".join(lines)
+
+    def bitmap(self) -> bytes:
+        """Returns the raw framebuffer, one byte (0 or 1) per pixel, row by row."""
+        return bytes(self.framebuffer)
+
+
 def main():
     data_path = get_input_path("Day 10: Cathode-Ray Tube")
     with open(data_path, "r") as file:
-        contents = file.read().splitlines()
-
-    start = time.monotonic()
-    instructions = preprocess_input(contents)
-    cycles = cycle(instructions)
-    sum_signal_strengths = evaluate_cycles(cycles)
-    crt = draw_crt(cycles)
-    stop = time.monotonic()
+        start = time.monotonic()
+        # Single pass over the program: every cycle feeds both parts.
+        sum_signal_strengths = 0
+        display = Crt()
+        for cycle, register_value in emulate(stream_instructions(file)):
+            sum_signal_strengths += signal_strength(cycle, register_value)
+            display.draw_pixel(cycle - 1, register_value)
+        crt = display.render(Encoding.EMOJI)
+        stop = time.monotonic()
 
     print(f"Sum of signal strengths: {sum_signal_strengths}")
     print(f"Image displayed on CRT:\n{crt}")
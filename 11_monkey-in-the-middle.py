@@ -7,7 +7,8 @@ from __future__ import annotations
 
 import re
 import time
-from typing import List, Optional
+from collections import deque
+from typing import Callable, Deque, Dict, List, MutableSequence, Optional, Tuple
 
 from aoc_utils import get_input_path, print_elapsed_time
 
@@ -20,13 +21,23 @@ class Monkey:
     TRUE_RGX = re.compile(r"If true:.*?(\d+)")
     FALSE_RGX = re.compile(r"If false:.*?(\d+)")
 
+    __slots__ = (
+        "_items",
+        "_apply_operation",
+        "divisor",
+        "_true_monkey",
+        "_false_monkey",
+        "inspected_items",
+    )
+
     def __init__(self, raw_input: str) -> None:
         item_string = self.ITEM_RGX.search(raw_input).group()  # type: ignore
-        self._items = list(map(int, self.NUM_RGX.findall(item_string)))
+        self._items: Deque[int] = deque(map(int, self.NUM_RGX.findall(item_string)))
 
         operation_match = self.OPERATION_RGX.search(raw_input)
-        self._operation = operation_match.group(1)  # type: ignore
-        self._operation_argument = operation_match.group(2)  # type: ignore
+        self._apply_operation = self._compile_operation(
+            operation_match.group(1), operation_match.group(2)  # type: ignore
+        )
 
         self.divisor = int(self.TEST_RGX.search(raw_input).group(1))  # type: ignore
 
@@ -35,42 +46,74 @@ class Monkey:
 
         self.inspected_items = 0
 
-    def _apply_operation(self, number: int) -> int:
-        other_number = (
-            number
-            if self._operation_argument == "old"
-            else int(self._operation_argument)
-        )
-        if self._operation == "*":
-            return number * other_number
-        elif self._operation == "+":
-            return number + other_number
+    @staticmethod
+    def _compile_operation(operation: str, argument: str) -> Callable[[int], int]:
+        """Resolves the operation once, so that applying it does not involve any string
+        comparisons or parsing."""
+        if argument == "old":
+            if operation == "*":
+                return lambda number: number * number
+            elif operation == "+":
+                return lambda number: number + number
+
+        value = int(argument)
+        if operation == "*":
+            return lambda number: number * value
+        elif operation == "+":
+            return lambda number: number + value
         else:
             assert False  # Should never happen.
 
-    def _throw_item(
-        self, item: int, monkeys: List[Monkey], divisor_product: Optional[int]
+    def _inspect_items(
+        self,
+        items: Deque[int],
+        divisor_product: Optional[int],
+        true_items: MutableSequence[int],
+        false_items: MutableSequence[int],
     ):
-        self.inspected_items += 1
-        worry_level = self._apply_operation(item)
+        """Drains `items`, appending each new worry level to the queue of its target
+        monkey. Everything is bound to locals, as this loop runs for every item in every
+        round."""
+        apply_operation, divisor = self._apply_operation, self.divisor
+        while items:
+            worry_level = apply_operation(items.popleft())
+            if divisor_product:
+                worry_level %= divisor_product
+            else:
+                worry_level //= 3
+            if worry_level % divisor == 0:
+                true_items.append(worry_level)
+            else:
+                false_items.append(worry_level)
+
+    def inspect(self, item: int, divisor_product: Optional[int]) -> Tuple[int, int]:
+        """Returns the new worry level of `item` and the index of the target monkey."""
+        true_items: List[int] = []
+        false_items: List[int] = []
+        self._inspect_items(deque([item]), divisor_product, true_items, false_items)
+        if true_items:
+            return true_items[0], self._true_monkey
+        return false_items[0], self._false_monkey
 
-        if divisor_product:
-            worry_level %= divisor_product
-        else:
-            worry_level //= 3
-
-        idx = (
-            self._true_monkey if worry_level % self.divisor == 0 else self._false_monkey
+    def throw_items(self, monkeys: List[Monkey], divisor_product: Optional[int]):
+        self.inspected_items += len(self._items)
+        self._inspect_items(
+            self._items,
+            divisor_product,
+            monkeys[self._true_monkey]._items,
+            monkeys[self._false_monkey]._items,
         )
 
-        monkeys[idx].receive(worry_level)
+    @property
+    def items(self) -> List[int]:
+        return list(self._items)
 
-    def throw_items(self, monkeys: List[Monkey], divisor_product: Optional[int]):
-        while len(self._items) > 0:
-            self._throw_item(self._items.pop(0), monkeys, divisor_product)
 
-    def receive(self, item: int):
-        self._items.append(item)
+def calculate_divisor_product(monkeys: List[Monkey]) -> int:
+    divisor_product = 1
+    for monkey in monkeys:
+        divisor_product *= monkey.divisor
+    return divisor_product
 
 
 def calculate_monkey_business_level(
@@ -78,9 +121,7 @@ def calculate_monkey_business_level(
 ) -> int:
     divisor_product = None
     if manage_worry_levels:
-        divisor_product = 1
-        for monkey in monkeys:
-            divisor_product *= monkey.divisor
+        divisor_product = calculate_divisor_product(monkeys)
 
     for _ in range(rounds):
         for monkey in monkeys:
@@ -90,6 +131,66 @@ def calculate_monkey_business_level(
     return monkeys[0].inspected_items * monkeys[1].inspected_items
 
 
+def track_item(
+    monkeys: List[Monkey], monkey_idx: int, item: int, rounds: int, divisor_product: int
+) -> List[int]:
+    """Follows a single item (held by `monkey_idx` at the start of the first round)
+    for `rounds` rounds and returns how often each monkey inspected it. Since the state
+    `(monkey, worry level)` at the start of a round eventually repeats, the counts are
+    extrapolated once a cycle is found."""
+    seen: Dict[Tuple[int, int], int] = {}
+    history: List[List[int]] = [[0] * len(monkeys)]  # Inspection counts per round.
+    state = (monkey_idx, item)
+
+    for current_round in range(rounds):
+        if state in seen:
+            cycle_start = seen[state]
+            cycle_length = current_round - cycle_start
+            cycles, remainder = divmod(rounds - cycle_start, cycle_length)
+            start_counts = history[cycle_start]
+            cycle_end_counts = history[current_round]
+            remainder_counts = history[cycle_start + remainder]
+            return [
+                start + cycles * (end - start) + (rem - start)
+                for start, end, rem in zip(
+                    start_counts, cycle_end_counts, remainder_counts
+                )
+            ]
+        seen[state] = current_round
+
+        # Within a round, the item keeps moving as long as it is thrown to a monkey
+        # that has not had its turn yet.
+        counts = list(history[-1])
+        idx, worry_level = state
+        while True:
+            counts[idx] += 1
+            worry_level, target = monkeys[idx].inspect(worry_level, divisor_product)
+            if target <= idx:
+                break
+            idx = target
+        history.append(counts)
+        state = (target, worry_level)
+
+    return history[-1]
+
+
+def calculate_monkey_business_level_with_cycles(
+    monkeys: List[Monkey], rounds: int
+) -> int:
+    """Same as `calculate_monkey_business_level` with managed worry levels, but tracks
+    each item independently so that the cost does not grow with the number of rounds."""
+    divisor_product = calculate_divisor_product(monkeys)
+    inspected_items = [0] * len(monkeys)
+
+    for monkey_idx, monkey in enumerate(monkeys):
+        for item in monkey.items:
+            counts = track_item(monkeys, monkey_idx, item, rounds, divisor_product)
+            inspected_items = [a + b for a, b in zip(inspected_items, counts)]
+
+    inspected_items.sort(reverse=True)
+    return inspected_items[0] * inspected_items[1]
+
+
 def main():
     data_path = get_input_path("Day 11: Monkey in the Middle")
     with open(data_path, "r") as file:
@@ -101,9 +202,7 @@ def main():
         monkeys, 20, manage_worry_levels=False
     )
     monkeys = [Monkey(raw_input) for raw_input in raw_inputs]  # Reset monkeys.
-    monkey_business_pt2 = calculate_monkey_business_level(
-        monkeys, 10000, manage_worry_levels=True
-    )
+    monkey_business_pt2 = calculate_monkey_business_level_with_cycles(monkeys, 10000)
     stop = time.monotonic()
 
     print(f"Monkey business level (part 1): {monkey_business_pt1}")
@@ -5,7 +5,9 @@
 
 import string
 import time
-from typing import List, NamedTuple, Optional, Tuple
+from array import array
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
 
 from aoc_utils import get_input_path, print_elapsed_time
 
@@ -22,6 +24,82 @@ class Node(NamedTuple):
     steps: int
 
 
+class HeightGrid:
+    """Compact height map: heights are stored in a flat `bytearray` indexed by
+    `row * cols + col`, and the neighbours of each cell are precomputed once in a
+    CSR-style table (`offsets[i]:offsets[i + 1]` slices into `neighbours`)."""
+
+    __slots__ = ("rows", "cols", "heights", "start", "end", "_offsets", "_neighbours")
+
+    def __init__(self, height_map: Map, reverse: bool = False) -> None:
+        self.rows = len(height_map)
+        self.cols = len(height_map[0])
+        self.heights = bytearray(self.rows * self.cols)
+        self.start = self.end = -1
+
+        for r, line in enumerate(height_map):
+            for c, ch in enumerate(line):
+                idx = r * self.cols + c
+                if ch == "S":
+                    self.start, ch = idx, "a"
+                elif ch == "E":
+                    self.end, ch = idx, "z"
+                self.heights[idx] = ord(ch) - ord("a")
+        assert self.start >= 0 and self.end >= 0
+
+        self._offsets, self._neighbours = self._build_neighbour_table(reverse)
+
+    def _build_neighbour_table(self, reverse: bool) -> Tuple[array, array]:
+        rows, cols, heights = self.rows, self.cols, self.heights
+        offsets = array("l", [0])
+        neighbours = array("l")
+
+        for idx in range(rows * cols):
+            r, c = divmod(idx, cols)
+            candidates = []
+            if r > 0:
+                candidates.append(idx - cols)
+            if c < cols - 1:
+                candidates.append(idx + 1)
+            if r < rows - 1:
+                candidates.append(idx + cols)
+            if c > 0:
+                candidates.append(idx - 1)
+
+            for other in candidates:
+                step = heights[other] - heights[idx]
+                if (-step if reverse else step) <= 1:
+                    neighbours.append(other)
+            offsets.append(len(neighbours))
+
+        return offsets, neighbours
+
+    def index(self, coordinate: Coordinate) -> int:
+        return coordinate.row * self.cols + coordinate.col
+
+    def coordinate(self, index: int) -> Coordinate:
+        return Coordinate(*divmod(index, self.cols))
+
+    def distances_from(self, source: int) -> array:
+        """Runs a BFS from `source` over the neighbour table and returns the distance to
+        every cell (-1 for unreachable cells)."""
+        offsets, neighbours = self._offsets, self._neighbours
+        distances = array("l", [-1]) * (self.rows * self.cols)
+        distances[source] = 0
+        queue: Deque[int] = deque([source])
+
+        while len(queue) > 0:
+            idx = queue.popleft()
+            steps = distances[idx] + 1
+            for i in range(offsets[idx], offsets[idx + 1]):
+                other = neighbours[i]
+                if distances[other] < 0:
+                    distances[other] = steps
+                    queue.append(other)
+
+        return distances
+
+
 def find_start_and_end(height_map: Map) -> Tuple[Coordinate, Coordinate]:
     start_pos = end_pos = None
     for r in range(len(height_map)):
@@ -45,7 +123,11 @@ def get_height_step(current_height: str, next_height: str) -> int:
     return next_val - cur_val
 
 
-def get_adjacent_coordinates(height_map: Map, cur_pos: Coordinate) -> List[Coordinate]:
+def get_adjacent_coordinates(
+    height_map: Map, cur_pos: Coordinate, reverse: bool = False
+) -> List[Coordinate]:
+    """Returns the coordinates reachable from `cur_pos` (or, if `reverse` is set, the
+    coordinates from which `cur_pos` can be reached)."""
     adjacent_coords: List[Coordinate] = []
     steps = [Coordinate(-1, 0), Coordinate(0, 1), Coordinate(1, 0), Coordinate(0, -1)]
 
@@ -54,18 +136,21 @@ def get_adjacent_coordinates(height_map: Map, cur_pos: Coordinate) -> List[Coord
         c = cur_pos.col + step.col
         if r < 0 or c < 0 or r >= len(height_map) or c >= len(height_map[0]):
             continue
-        if get_height_step(height_map[cur_pos.row][cur_pos.col], height_map[r][c]) <= 1:
+        cur_height, next_height = height_map[cur_pos.row][cur_pos.col], height_map[r][c]
+        if reverse:
+            cur_height, next_height = next_height, cur_height
+        if get_height_step(cur_height, next_height) <= 1:
             adjacent_coords.append(Coordinate(row=r, col=c))
 
     return adjacent_coords
 
 
 def bfs(height_map: Map, start_pos: Coordinate, end_pos: Coordinate) -> Optional[int]:
-    queue = [Node(start_pos, 0)]
+    queue: Deque[Node] = deque([Node(start_pos, 0)])
     visited = {start_pos}
 
     while len(queue) > 0:
-        current_node = queue.pop(0)
+        current_node = queue.popleft()
         if current_node.position == end_pos:
             return current_node.steps
 
@@ -78,6 +163,24 @@ def bfs(height_map: Map, start_pos: Coordinate, end_pos: Coordinate) -> Optional
     return None
 
 
+def reverse_bfs(height_map: Map, end_pos: Coordinate) -> Dict[Coordinate, int]:
+    """Searches backwards from `end_pos` with the climbing rule inverted and returns the
+    shortest distance to the goal for every coordinate that can reach it."""
+    distances = {end_pos: 0}
+    queue: Deque[Coordinate] = deque([end_pos])
+
+    while len(queue) > 0:
+        position = queue.popleft()
+        steps = distances[position] + 1
+        for coordinate in get_adjacent_coordinates(height_map, position, reverse=True):
+            if coordinate in distances:
+                continue
+            distances[coordinate] = steps
+            queue.append(coordinate)
+
+    return distances
+
+
 def generate_possible_starting_points(height_map: Map) -> List[Coordinate]:
     starting_points: List[Coordinate] = []
     for r in range(len(height_map)):
@@ -88,17 +191,29 @@ def generate_possible_starting_points(height_map: Map) -> List[Coordinate]:
 
 
 def find_best_starting_point(
-    height_map: Map, start_pos: Coordinate, end_pos: Coordinate
+    height_map: Map,
+    start_pos: Coordinate,
+    end_pos: Coordinate,
+    distances: Optional[Dict[Coordinate, int]] = None,
 ) -> Optional[int]:
-    starting_points = generate_possible_starting_points(height_map)
-    current_best = bfs(height_map, start_pos, end_pos)
+    if distances is None:
+        distances = reverse_bfs(height_map, end_pos)
+    starting_points = [start_pos] + generate_possible_starting_points(height_map)
+    steps = [distances[start] for start in starting_points if start in distances]
+    return min(steps, default=None)
 
-    for start in starting_points:
-        steps = bfs(height_map, start, end_pos)
-        if current_best is None or (steps is not None and steps < current_best):
-            current_best = steps
 
-    return current_best
+def find_best_starting_point_on_grid(
+    grid: HeightGrid, distances: array
+) -> Optional[int]:
+    """Same as `find_best_starting_point`, but for a reverse `HeightGrid` and the
+    distances returned by `grid.distances_from(grid.end)`."""
+    steps = [
+        distances[idx]
+        for idx, height in enumerate(grid.heights)
+        if height == 0 and distances[idx] >= 0
+    ]
+    return min(steps, default=None)
 
 
 def main():
@@ -107,10 +222,11 @@ def main():
         height_map: Map = [[c for c in line] for line in file.read().splitlines()]
 
     start = time.monotonic()
-    start_point, end_point = find_start_and_end(height_map)
-    steps = bfs(height_map, start_point, end_point)
-    best_steps = find_best_starting_point(height_map, start_point, end_point)
-    assert steps is not None and best_steps is not None
+    grid = HeightGrid(height_map, reverse=True)
+    distances = grid.distances_from(grid.end)
+    steps = distances[grid.start]
+    best_steps = find_best_starting_point_on_grid(grid, distances)
+    assert steps >= 0 and best_steps is not None
     stop = time.monotonic()
 
     print(f"Steps to goal from original starting point: {steps}")
@@ -6,12 +6,17 @@
 import json
 import time
 from enum import Enum
-from typing import Any, List, Tuple
+from functools import cmp_to_key
+from typing import Any, Callable, Iterable, Iterator, List, Sequence, Tuple, Union
 
 from aoc_utils import get_input_path, print_elapsed_time
 
 Packet = List[Any]
 PacketPair = Tuple[Packet, Packet]
+Token = Union[int, str]
+
+DIVIDER_PACKETS: Tuple[Packet, Packet] = ([[2]], [[6]])
+RAW_DIVIDER_PACKETS: Tuple[str, str] = ("[[2]]", "[[6]]")
 
 
 class Result(Enum):
@@ -58,6 +63,58 @@ def compare_lists(lhs: Packet, rhs: Packet) -> Result:
     return Result.VALID if len(lhs) < len(rhs) else Result.INVALID
 
 
+def tokenize(raw_packet: str) -> Iterator[Token]:
+    """Yields the brackets and integers of `raw_packet` one at a time (commas are
+    skipped)."""
+    i, n = 0, len(raw_packet)
+    while i < n:
+        ch = raw_packet[i]
+        if ch.isdigit():
+            j = i + 1
+            while j < n and raw_packet[j].isdigit():
+                j += 1
+            yield int(raw_packet[i:j])
+            i = j
+            continue
+        if ch != ",":
+            yield ch
+        i += 1
+
+
+def compare_raw_packets(lhs: str, rhs: str) -> Result:
+    """Compares two packets directly from their text representation, token by token.
+    Integers compared against a list are promoted on the fly by pushing the integer and
+    a closing bracket back onto the respective token stream."""
+    left_tokens, right_tokens = tokenize(lhs), tokenize(rhs)
+    left_pending: List[Token] = []
+    right_pending: List[Token] = []
+
+    while True:
+        left = left_pending.pop() if left_pending else next(left_tokens, None)
+        right = right_pending.pop() if right_pending else next(right_tokens, None)
+        if left is None or right is None:
+            return Result.UNDECIDED
+
+        if type(left) is int and type(right) is int:
+            result = compare_integers(left, right)
+            if result == Result.UNDECIDED:
+                continue
+            return result
+
+        if left == right:
+            continue
+        if left == "]":
+            return Result.VALID
+        if right == "]":
+            return Result.INVALID
+
+        # One side opens a list while the other one is an integer.
+        if type(left) is int:
+            left_pending.extend(["]", left])
+        else:
+            right_pending.extend(["]", right])
+
+
 def calculate_sum_of_valid_indices(packet_pairs: List[PacketPair]) -> int:
     sum_of_indices = 0
     for idx, (lhs, rhs) in enumerate(packet_pairs):
@@ -67,39 +124,91 @@ def calculate_sum_of_valid_indices(packet_pairs: List[PacketPair]) -> int:
     return sum_of_indices
 
 
+def compare_packets(lhs: Packet, rhs: Packet) -> int:
+    """Three-way comparison of two packets, usable with `functools.cmp_to_key`."""
+    result = compare_lists(lhs, rhs)
+    if result == Result.UNDECIDED:
+        return 0
+    return -1 if result == Result.VALID else 1
+
+
+def calculate_sum_of_valid_indices_raw(contents: str) -> int:
+    """Same as `calculate_sum_of_valid_indices`, but works on the raw puzzle input."""
+    sum_of_indices = 0
+    for idx, pair in enumerate(contents.split("\n\n")):
+        lhs, rhs = pair.splitlines()
+        if compare_raw_packets(lhs, rhs) == Result.VALID:
+            sum_of_indices += idx + 1
+    return sum_of_indices
+
+
 def sort_packets(packets: List[Packet]):
-    """Sorts the `packets` using an optimized bubble sort algorithm."""
-    n = len(packets)
-    while n > 1:
-        new_n = 0
-        for i in range(1, n):
-            if compare_lists(packets[i - 1], packets[i]) == Result.INVALID:
-                packets[i - 1], packets[i] = packets[i], packets[i - 1]
-                new_n = i
-        n = new_n
+    """Sorts the `packets` in place."""
+    packets.sort(key=cmp_to_key(compare_packets))
 
 
 def find_decoder_key(sorted_packets: List[Packet]) -> int:
     key = 1
+    found = 0
     for idx, packet in enumerate(sorted_packets):
-        if packet in [[[2]], [[6]]]:
+        if packet in DIVIDER_PACKETS:
             key *= idx + 1
+            found += 1
+    assert found >= len(DIVIDER_PACKETS)  # The divider packets must have been added.
+    return key
+
+
+def rank_divider_packets(
+    packets: Iterable[Any],
+    dividers: Sequence[Any],
+    compare: Callable[[Any, Any], Result],
+) -> int:
+    """Calculates the decoder key from the ranks of the `dividers` (in ascending order)
+    in a single pass, without sorting. The result is the same as sorting `packets` with
+    the dividers appended (`sort_packets` is stable) and calling `find_decoder_key`:
+    packets comparing equal to a divider are ranked before it, and packets that are
+    identical to a divider count as dividers themselves."""
+    smaller = list(range(len(dividers)))  # Earlier dividers are smaller.
+    ties = [0] * len(dividers)
+    tie_positions: List[List[int]] = [[] for _ in dividers]
+
+    for packet in packets:
+        for idx, divider in enumerate(dividers):
+            result = compare(packet, divider)
+            if result == Result.VALID:
+                smaller[idx] += 1
+            elif result == Result.UNDECIDED:
+                ties[idx] += 1
+                if packet == divider:
+                    tie_positions[idx].append(ties[idx])
+
+    key = 1
+    for idx in range(len(dividers)):
+        tie_positions[idx].append(ties[idx] + 1)  # The divider itself comes last.
+        for position in tie_positions[idx]:
+            key *= smaller[idx] + position
     return key
 
 
+def calculate_decoder_key(packets: List[Packet]) -> int:
+    """Calculates the decoder key of `packets` (without divider packets)."""
+    return rank_divider_packets(packets, DIVIDER_PACKETS, compare_lists)
+
+
+def calculate_decoder_key_raw(contents: str) -> int:
+    """Same as `calculate_decoder_key`, but works on the raw puzzle input."""
+    lines = (line for line in contents.splitlines() if line)
+    return rank_divider_packets(lines, RAW_DIVIDER_PACKETS, compare_raw_packets)
+
+
 def main():
     data_path = get_input_path("Day 13: Distress Signal")
     with open(data_path, "r") as file:
         contents = file.read()
 
     start = time.monotonic()
-    packet_pairs = preprocess_input(contents)
-    sum_of_valid_indices = calculate_sum_of_valid_indices(packet_pairs)
-
-    all_packets = [p for pair in packet_pairs for p in pair]
-    all_packets.extend([[[2]], [[6]]])
-    sort_packets(all_packets)
-    decoder_key = find_decoder_key(all_packets)
+    sum_of_valid_indices = calculate_sum_of_valid_indices_raw(contents)
+    decoder_key = calculate_decoder_key_raw(contents)
     stop = time.monotonic()
 
     print(f"Sum of valid indices: {sum_of_valid_indices}")
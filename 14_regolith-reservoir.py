@@ -60,44 +60,72 @@ def simulate_one_step(
     return position
 
 
-def simulate(rock_structures: Map) -> int:
+def simulate_resumable(rock_structures: Map, with_floor: bool) -> int:
+    """Drops sand until it either falls into the abyss or (`with_floor`) blocks the
+    source. The path of the previous grain is kept as a stack, so the next grain resumes
+    from the last position that is still open instead of the sand source."""
     sand_at_rest: Map = set()
-    sand_position = SAND_START_LOCATION
+    path = [SAND_START_LOCATION]
     max_y = max([coord[1] for coord in rock_structures])
 
-    while True:
-        if sand_position[1] == max_y:
+    while len(path) > 0:
+        sand_position = path[-1]
+        if not with_floor and sand_position[1] == max_y:
             break
 
         new_position = simulate_one_step(sand_position, rock_structures, sand_at_rest)
         if new_position == sand_position:
-            sand_at_rest.add(sand_position)
-            sand_position = SAND_START_LOCATION
-            continue
-
-        sand_position = new_position
+            sand_at_rest.add(path.pop())
+        elif with_floor and new_position[1] == (max_y + 1):
+            sand_at_rest.add(new_position)
+        else:
+            path.append(new_position)
 
     return len(sand_at_rest)
 
 
+def simulate(rock_structures: Map) -> int:
+    return simulate_resumable(rock_structures, with_floor=False)
+
+
 def simulate_with_floor(rock_structures: Map) -> int:
-    sand_at_rest: Map = set()
-    sand_position = SAND_START_LOCATION
-    max_y = max([coord[1] for coord in rock_structures])
+    return simulate_resumable(rock_structures, with_floor=True)
 
-    while True:
-        if SAND_START_LOCATION in sand_at_rest:
-            break
 
-        new_position = simulate_one_step(sand_position, rock_structures, sand_at_rest)
-        if new_position == sand_position or new_position[1] == (max_y + 1):
-            sand_at_rest.add(new_position)
-            sand_position = SAND_START_LOCATION
-            continue
+class CaveGrid:
+    """Dense, bounded rasterisation of the cave: every row is stored as an integer
+    bitset where bit `x - x_offset` is set if there is rock at `(x, y)`. The bounds
+    cover everything sand can reach when falling onto the floor at `max_y + 2`."""
 
-        sand_position = new_position
+    __slots__ = ("x_offset", "width", "rock_rows")
 
-    return len(sand_at_rest)
+    def __init__(self, rock_structures: Map) -> None:
+        max_y = max([coord[1] for coord in rock_structures])
+        # Sand can spread at most one column per row, so the floor bounds the width.
+        reach = max_y + 2
+        self.x_offset = SAND_START_LOCATION[0] - reach
+        self.width = 2 * reach + 1
+        self.rock_rows = [0] * (max_y + 2)
+
+        for x, y in rock_structures:
+            col = x - self.x_offset
+            if 0 <= col < self.width:
+                self.rock_rows[y] |= 1 << col
+
+    def count_sand_with_floor(self) -> int:
+        """Sweeps the cave row by row: a cell fills with sand if it is not rock and any
+        of the three cells above it is filled. The floor itself is never filled."""
+        mask = (1 << self.width) - 1
+        filled_row = 1 << (SAND_START_LOCATION[0] - self.x_offset)
+        total = 0
+
+        for y, rock_row in enumerate(self.rock_rows):
+            if y > 0:
+                filled_row |= (filled_row << 1) | (filled_row >> 1)
+            filled_row &= ~rock_row & mask
+            total += bin(filled_row).count("1")
+
+        return total
 
 
 def main():
@@ -108,7 +136,7 @@ def main():
     start = time.monotonic()
     rock_structures = generate_map(scans)
     units_at_rest = simulate(rock_structures)
-    units_at_rest_after_blocked = simulate_with_floor(rock_structures)
+    units_at_rest_after_blocked = CaveGrid(rock_structures).count_sand_with_floor()
     stop = time.monotonic()
 
     print(f"Sand units at rest until free-falling: {units_at_rest}")